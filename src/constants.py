@@ -7,6 +7,10 @@ DATA_DIR = "data"
 # Поддерживаемые типы данных
 VALID_TYPES = {"int", "str", "bool"}
 
+# Диапазон значений столбцов int (64-битное знаковое целое)
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+
 # Сообщения об ошибках
 ERROR_TABLE_EXISTS = 'Таблица "{}" уже существует.'
 ERROR_TABLE_NOT_EXISTS = 'Таблица "{}" не существует.'
@@ -14,11 +18,15 @@ ERROR_INVALID_FORMAT = 'Некорректный формат столбца: "{
 ERROR_UNSUPPORTED_TYPE = 'Неподдерживаемый тип данных: "{}". Допустимые: {}.'
 ERROR_WRONG_VALUE_COUNT = 'Неверное количество значений. Ожидается: {}, получено: {}.'
 ERROR_TYPE_MISMATCH = "Несоответствие типов данных."
+ERROR_INT_OUT_OF_RANGE = "Целое число {} вне допустимого диапазона [{}, {}]."
+ERROR_ID_READONLY = 'Столбец "ID" нельзя изменять.'
+ERROR_IN_ROW = "Строка {}: {}"
 
 # Сообщения об успехе
 SUCCESS_TABLE_CREATED = 'Таблица "{}" успешно создана. Столбцы: {}'
 SUCCESS_TABLE_DROPPED = 'Таблица "{}" успешно удалена.'
 SUCCESS_RECORD_ADDED = 'Запись с ID={} успешно добавлена в таблицу "{}".'
+SUCCESS_RECORDS_ADDED = 'Записи с ID={} успешно добавлены в таблицу "{}".'
 SUCCESS_RECORD_UPDATED = 'Записи с ID={} в таблице "{}" успешно обновлены.'
 SUCCESS_RECORD_DELETED = 'Записи с ID={} успешно удалены из таблицы "{}".'
 
@@ -27,4 +35,8 @@ CONFIRM_DROP_TABLE = "удаление таблицы"
 CONFIRM_DELETE_RECORDS = "удаление записей"
 
 # Пороги для логирования
-LOG_TIME_THRESHOLD = 0.1  # секунд
\ No newline at end of file
+LOG_TIME_THRESHOLD = 0.1  # секунд
+
+# Параметры журнала таблиц
+LOG_FSYNC_THRESHOLD = 64  # записей между вызовами fsync
+LOG_COMPACT_RATIO = 0.25  # доля патчей, после которой журнал сжимается
@@ -1,12 +1,15 @@
 """Декораторы для обработки ошибок, логирования и подтверждения действий."""
 import functools
 import time
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Optional
 
 import prompt
 
 from .constants import LOG_TIME_THRESHOLD
 
+# Порог логирования в наносекундах для целочисленного сравнения
+_THRESHOLD_NS = int(LOG_TIME_THRESHOLD * 1e9)
+
 
 def handle_db_errors(func: Callable) -> Callable:
     """
@@ -47,34 +50,48 @@ def handle_db_errors(func: Callable) -> Callable:
     return wrapper
 
 
-def confirm_action(action_name: str) -> Callable:
+def confirm_action(
+        action_name: str,
+        prompter: Optional[Callable[[str], str]] = prompt.string
+) -> Callable:
     """
     Фабрика декораторов для запроса подтверждения действий.
 
+    Вызов обернутой функции с force=True выполняет ее без запроса
+    подтверждения (для пакетных сценариев и скриптов).
+
     Args:
         action_name: Название действия для отображения пользователю
+        prompter: Функция запроса ответа у пользователя; None - не спрашивать
 
     Returns:
         Декоратор, запрашивающий подтверждение
     """
+    # Шаблоны сообщения строятся один раз для действия
+    question = f'Вы уверены, что хотите выполнить "{action_name}"'
+    message_no_table = question + "? [y/n]: "
+    message_with_table = question.replace("{", "{{").replace("}", "}}")
+    message_with_table += ' таблицы "{}"? [y/n]: '
 
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
+            if kwargs.pop('force', False) or prompter is None:
+                return func(*args, **kwargs)
+
             # Получаем имя таблицы из аргументов (обычно второй аргумент)
             table_name = ""
             if len(args) > 1:
                 table_name = args[1] if isinstance(args[1], str) else ""
 
-            # Формируем сообщение
-            message = f'Вы уверены, что хотите выполнить "{action_name}"'
             if table_name:
-                message += f' таблицы "{table_name}"'
-            message += "? [y/n]: "
+                message = message_with_table.format(table_name)
+            else:
+                message = message_no_table
 
             # Запрашиваем подтверждение
             try:
-                response = prompt.string(message).strip().lower()
+                response = prompter(message).strip().lower()
             except (KeyboardInterrupt, EOFError):
                 print("\nОперация отменена.")
                 return None
@@ -104,48 +121,14 @@ def log_time(func: Callable) -> Callable:
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs) -> Any:
-        start_time = time.monotonic()
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.monotonic()
+        elapsed_ns = time.perf_counter_ns() - start_ns
 
-        elapsed = end_time - start_time
-        if elapsed > LOG_TIME_THRESHOLD:
+        if elapsed_ns > _THRESHOLD_NS:
+            elapsed = elapsed_ns / 1e9
             print(f"Функция {func.__name__} выполнилась за {elapsed:.3f} секунд")
 
         return result
 
     return wrapper
-
-
-def create_cacher() -> Callable:
-    """
-    Создает функцию для кэширования результатов.
-
-    Returns:
-        Функция cache_result(key, value_func) с замыканием на кэш
-    """
-    cache: Dict[str, Any] = {}
-
-    def cache_result(key: str, value_func: Callable[[], Any]) -> Any:
-        """
-        Возвращает значение из кэша или вычисляет и сохраняет его.
-
-        Args:
-            key: Ключ для кэша
-            value_func: Функция для вычисления значения
-
-        Returns:
-            Значение из кэша или вычисленное значение
-        """
-        if key in cache:
-            return cache[key]
-
-        value = value_func()
-        cache[key] = value
-        return value
-
-    return cache_result
-
-
-# Создаем глобальный кэшер для использования в проекте
-cacher = create_cacher()
\ No newline at end of file
@@ -1,30 +1,72 @@
 """Основная логика работы с таблицами и данными базы данных."""
-from typing import Any, Dict, List, Optional, Tuple
+import functools
+from collections import defaultdict
+from enum import IntEnum
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from prettytable import PrettyTable
 
 from src.constants import (
     CONFIRM_DELETE_RECORDS,
     CONFIRM_DROP_TABLE,
+    ERROR_ID_READONLY,
+    ERROR_IN_ROW,
+    ERROR_INT_OUT_OF_RANGE,
     ERROR_INVALID_FORMAT,
     ERROR_TABLE_EXISTS,
     ERROR_TABLE_NOT_EXISTS,
     ERROR_TYPE_MISMATCH,
     ERROR_UNSUPPORTED_TYPE,
     ERROR_WRONG_VALUE_COUNT,
+    INT_MAX,
+    INT_MIN,
     SUCCESS_RECORD_ADDED,
     SUCCESS_RECORD_DELETED,
     SUCCESS_RECORD_UPDATED,
+    SUCCESS_RECORDS_ADDED,
     SUCCESS_TABLE_CREATED,
     SUCCESS_TABLE_DROPPED,
     VALID_TYPES,
 )
-from src.decorators import cacher, confirm_action, handle_db_errors, log_time
+from src.decorators import confirm_action, handle_db_errors, log_time
+
+from .utils import (
+    append_table_log,
+    apply_patch,
+    get_table_load_version,
+    get_table_version,
+    load_table_rows,
+    save_table_data,
+)
 
-from .utils import load_table_data, save_table_data
+try:
+    import wcwidth
+except ImportError:
+    wcwidth = None
+
+
+class ColumnType(IntEnum):
+    """Код типа столбца, используемый как индекс в таблицах ниже."""
+
+    INT = 0
+    STR = 1
+    BOOL = 2
+
+
+# Коды типов по их именам в метаданных
+_TYPE_CODES = {"int": ColumnType.INT, "str": ColumnType.STR, "bool": ColumnType.BOOL}
+# Типы Python по коду типа
+_PY_TYPES = (int, str, bool)
+# Выравнивание столбцов в выводе по коду типа
+_ALIGN = ("r", "l", "c")
+
+# Хэш-индексы по столбцам: таблица -> столбец -> {значение: множество ID}
+_INDEXES: Dict[str, Dict[str, Dict[Any, Set[int]]]] = {}
+# Версия данных таблицы, с которой согласованы ее индексы
+_INDEX_VERSION: Dict[str, int] = {}
 
 
-@handle_db_errors
 def create_table(
         metadata: Dict[str, Any],
         table_name: str,
@@ -53,7 +95,7 @@ def create_table(
         col_name, col_type = col.split(':', 1)
         col_type = col_type.lower()
 
-        if col_type not in VALID_TYPES:
+        if col_type not in _TYPE_CODES:
             types_str = ", ".join(VALID_TYPES)
             error_msg = ERROR_UNSUPPORTED_TYPE.format(col_type, types_str)
             return False, error_msg, metadata
@@ -62,7 +104,8 @@ def create_table(
 
     full_columns = [{"name": "ID", "type": "int"}] + parsed_columns
 
-    metadata[table_name] = {"columns": full_columns}
+    metadata[table_name] = {"columns": full_columns, "next_id": 1}
+    _prepare_table_meta(metadata[table_name])
 
     save_table_data(table_name, [])
 
@@ -81,6 +124,8 @@ def drop_table(
     """
     Удаляет таблицу из базы данных.
 
+    Запрашивает подтверждение; передайте force=True, чтобы пропустить его.
+
     Args:
         metadata: Текущие метаданные БД
         table_name: Имя таблицы для удаления
@@ -88,18 +133,21 @@ def drop_table(
     Returns:
         Tuple: (успех, сообщение, новые_метаданные)
     """
-    if table_name not in metadata:
+    try:
+        del metadata[table_name]
+    except KeyError:
         return False, ERROR_TABLE_NOT_EXISTS.format(table_name), metadata
 
-    del metadata[table_name]
-
     from .utils import delete_table_file
     delete_table_file(table_name)
+    _INDEXES.pop(table_name, None)
+    _INDEX_VERSION.pop(table_name, None)
+    # Результаты выборок из удаленной таблицы больше не понадобятся
+    _select_cached.cache_clear()
 
     return True, SUCCESS_TABLE_DROPPED.format(table_name), metadata
 
 
-@handle_db_errors
 def list_tables(metadata: Dict[str, Any]) -> str:
     """
     Возвращает строку со списком таблиц.
@@ -123,6 +171,84 @@ def list_tables(metadata: Dict[str, Any]) -> str:
     return "\n".join(result)
 
 
+def _prepare_table_meta(table_meta: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Дополняет метаданные таблицы производными полями схемы.
+
+    Поля вычисляются один раз и хранятся в памяти вместе с метаданными:
+    "_columns" - все столбцы по порядку, "_col_idx" - {столбец: позиция
+    в строке}, "_data_columns" - столбцы без ID, "_insert_fn" -
+    сгенерированная под схему функция сборки строки.
+
+    Args:
+        table_meta: Метаданные таблицы
+
+    Returns:
+        Те же метаданные с производными полями
+    """
+    if "_data_columns" not in table_meta:
+        columns = table_meta["columns"]
+        table_meta["_columns"] = tuple(c["name"] for c in columns)
+        table_meta["_col_idx"] = {c["name"]: i for i, c in enumerate(columns)}
+        table_meta["_data_columns"] = tuple(c["name"] for c in columns[1:])
+        expected_types = tuple(_PY_TYPES[_TYPE_CODES[c["type"]]] for c in columns[1:])
+        table_meta["_insert_fn"] = _compile_insert_fn(expected_types)
+    return table_meta
+
+
+def _compile_insert_fn(expected_types: Tuple[type, ...]) -> Callable:
+    """
+    Генерирует функцию сборки строки для конкретной схемы таблицы.
+
+    Проверки типов и сборка кортежа разворачиваются в код без циклов,
+    например для схемы (str, int):
+
+        def _insert_fn(values, new_id):
+            v0, v1 = values
+            if type(v0) is not str or type(v1) is not int:
+                return None
+            if not INT_MIN <= v1 <= INT_MAX:
+                return False
+            return (new_id, v0, v1)
+
+    Значения int ограничены 64 битами, чтобы журнал одинаково читался
+    и стандартным json, и orjson. Количество значений должно быть
+    проверено вызывающим кодом.
+
+    Args:
+        expected_types: Типы Python для столбцов без ID
+
+    Returns:
+        Функция (values, new_id) -> строка, None при несовпадении типов
+        или False при выходе int за допустимый диапазон
+    """
+    names = [f"v{i}" for i in range(len(expected_types))]
+    lines = ["def _insert_fn(values, new_id):"]
+    if names:
+        checks = " or ".join(
+            f"type({name}) is not {expected.__name__}"
+            for name, expected in zip(names, expected_types)
+        )
+        lines.append(f"    {', '.join(names)}, = values")
+        lines.append(f"    if {checks}:")
+        lines.append("        return None")
+        ranges = " or ".join(
+            f"not INT_MIN <= {name} <= INT_MAX"
+            for name, expected in zip(names, expected_types)
+            if expected is int
+        )
+        if ranges:
+            lines.append(f"    if {ranges}:")
+            lines.append("        return False")
+    lines.append(f"    return (new_id, {', '.join(names)})")
+
+    namespace: Dict[str, Any] = {}
+    builtins = {expected.__name__: expected for expected in _PY_TYPES}
+    builtins.update(INT_MIN=INT_MIN, INT_MAX=INT_MAX)
+    exec("\n".join(lines), builtins, namespace)
+    return namespace["_insert_fn"]
+
+
 def validate_column_format(column: str) -> bool:
     """
     Проверяет формат столбца.
@@ -137,52 +263,229 @@ def validate_column_format(column: str) -> bool:
         return False
 
     _, col_type = column.split(':', 1)
-    return col_type.lower() in VALID_TYPES
+    return col_type.lower() in _TYPE_CODES
 
 
-def get_column_types(metadata: Dict[str, Any], table_name: str) -> Dict[str, str]:
+def _sync_indexes(table_name: str) -> Dict[str, Dict[Any, Set[int]]]:
     """
-    Возвращает словарь с типами столбцов таблицы.
+    Возвращает индексы таблицы, сбрасывая их, если данные перечитаны.
 
     Args:
-        metadata: Метаданные БД
         table_name: Имя таблицы
 
     Returns:
-        Словарь {имя_столбца: тип}
+        Словарь {столбец: индекс} для таблицы
+    """
+    version = get_table_version(table_name)
+    if _INDEX_VERSION.get(table_name) != version:
+        _INDEXES.pop(table_name, None)
+        _INDEX_VERSION[table_name] = version
+    return _INDEXES.setdefault(table_name, {})
+
+
+def _build_index(
+        rows: Dict[int, Tuple[Any, ...]],
+        position: int
+) -> Dict[Any, Set[int]]:
     """
-    if table_name not in metadata:
-        return {}
+    Строит индекс {значение: множество ID} по одному столбцу.
 
-    return {col["name"]: col["type"] for col in metadata[table_name]["columns"]}
+    Столбец извлекается из всех строк целиком через itemgetter и
+    сопоставляется с ID через zip, без обращения к строкам по индексу
+    в цикле.
 
+    Args:
+        rows: Строки таблицы по ID
+        position: Позиция столбца в строке
 
-def validate_data_types(values: List[Any], column_types: Dict[str, str]) -> bool:
+    Returns:
+        Индекс столбца
+    """
+    index: Dict[Any, Set[int]] = defaultdict(set)
+    column = map(itemgetter(position), rows.values())
+    for rid, value in zip(rows, column):
+        index[value].add(rid)
+    return index
+
+
+def _indexed_ids(
+        table_name: str,
+        col_idx: Dict[str, int],
+        rows: Dict[int, Tuple[Any, ...]],
+        where_clause: Dict[str, Any]
+) -> Set[int]:
     """
-    Проверяет соответствие значений типам столбцов.
+    Находит ID строк, удовлетворяющих условию равенства, по индексам.
+
+    Индекс столбца строится при первом обращении и дальше обновляется
+    точечно при записи. Условие по ID проверяется первым и без индекса
+    (ID уникален), затем условия по уже построенным индексам и только
+    потом остальные; если какое-то условие не дает ни одной строки,
+    остальные индексы не строятся. Множества пересекаются от меньшего
+    к большему. Пустому условию удовлетворяют все строки.
 
     Args:
-        values: Список значений
-        column_types: Словарь с типами столбцов (без ID)
+        table_name: Имя таблицы
+        col_idx: Позиции столбцов в строке
+        rows: Строки таблицы по ID
+        where_clause: Условие {столбец: значение}
 
     Returns:
-        True если типы соответствуют
+        Множество ID подходящих строк
     """
-    data_columns = list(column_types.keys())[1:]  # без ID
+    if not where_clause:
+        return set(rows)
+
+    indexes = _sync_indexes(table_name)
+    predicates = sorted(
+        where_clause.items(),
+        key=lambda item: (item[0] != "ID", item[0] not in indexes),
+    )
+
+    id_sets = []
+    for column, value in predicates:
+        if column == "ID":
+            row = rows.get(value)
+            ids = {row[0]} if row is not None else set()
+        else:
+            index = indexes.get(column)
+            if index is None:
+                position = col_idx.get(column)
+                if position is None:
+                    return set()
+                index = _build_index(rows, position)
+                indexes[column] = index
+            ids = index.get(value, set())
 
-    if len(values) != len(data_columns):
-        return False
+        if not ids:
+            return set()
+        id_sets.append(ids)
 
-    for value, col_name in zip(values, data_columns):
-        expected_type = column_types[col_name]
-        if expected_type == "int" and not isinstance(value, int):
-            return False
-        elif expected_type == "str" and not isinstance(value, str):
-            return False
-        elif expected_type == "bool" and not isinstance(value, bool):
-            return False
+    id_sets.sort(key=len)
+    return set.intersection(*id_sets)
 
-    return True
+
+def _update_indexes(
+        table_name: str,
+        col_idx: Dict[str, int],
+        old_row: Optional[Tuple[Any, ...]],
+        new_row: Optional[Tuple[Any, ...]],
+        columns: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Точечно обновляет индексы таблицы при изменении одной строки.
+
+    Args:
+        table_name: Имя таблицы
+        col_idx: Позиции столбцов в строке
+        old_row: Строка до изменения (None при вставке)
+        new_row: Строка после изменения (None при удалении)
+        columns: Изменившиеся столбцы (по умолчанию - все)
+    """
+    indexes = _sync_indexes(table_name)
+    if columns is None:
+        columns = list(indexes)
+
+    for column in columns:
+        index = indexes.get(column)
+        if index is None:
+            continue
+        position = col_idx[column]
+        if old_row is not None:
+            old_value = old_row[position]
+            ids = index.get(old_value)
+            if ids is not None:
+                ids.discard(old_row[0])
+                if not ids:
+                    del index[old_value]
+        if new_row is not None:
+            index.setdefault(new_row[position], set()).add(new_row[0])
+
+
+def _write_log(
+        table_name: str,
+        col_idx: Dict[str, int],
+        entries: List[Dict[str, Any]],
+        changes: List[Tuple[Optional[Tuple[Any, ...]], Optional[Tuple[Any, ...]]]],
+        columns: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Записывает изменения в журнал таблицы и затем обновляет индексы.
+
+    Индексы меняются только после успешной записи: если запись в журнал
+    не удалась, исключение передается вызывающему коду, а индексы
+    остаются согласованными с данными.
+
+    Args:
+        table_name: Имя таблицы
+        col_idx: Позиции столбцов в строке
+        entries: Записи журнала
+        changes: Пары (строка до, строка после) для обновления индексов
+        columns: Изменившиеся столбцы (по умолчанию - все)
+    """
+    # Индексы, отставшие от данных, сбрасываются до записи
+    _sync_indexes(table_name)
+    append_table_log(table_name, entries)
+    _INDEX_VERSION[table_name] = get_table_version(table_name)
+    for old_row, new_row in changes:
+        _update_indexes(table_name, col_idx, old_row, new_row, columns)
+
+
+def _out_of_range(value: Any) -> bool:
+    """
+    Проверяет, что целое значение не помещается в столбец int.
+
+    Args:
+        value: Значение
+
+    Returns:
+        True если это int (не bool) вне 64-битного диапазона
+    """
+    return type(value) is int and not INT_MIN <= value <= INT_MAX
+
+
+def _row_error(result: Optional[bool], values: List[Any]) -> str:
+    """
+    Возвращает сообщение об ошибке по результату функции _insert_fn.
+
+    Args:
+        result: None (несовпадение типов) или False (выход за диапазон)
+        values: Вставляемые значения
+
+    Returns:
+        Текст ошибки
+    """
+    if result is None:
+        return ERROR_TYPE_MISMATCH
+    value = next(v for v in values if _out_of_range(v))
+    return ERROR_INT_OUT_OF_RANGE.format(value, INT_MIN, INT_MAX)
+
+
+def _allocate_ids(table_name: str, table_meta: Dict[str, Any], count: int) -> int:
+    """
+    Выделяет подряд идущие ID из счетчика next_id таблицы.
+
+    После каждого чтения таблицы с диска счетчик сверяется с наибольшим
+    ID в журнале: если процесс завершился между записью в журнал и
+    сохранением метаданных или журнал дописан извне, счетчик отстает,
+    и без сверки ID выдавались бы повторно.
+
+    Args:
+        table_name: Имя таблицы
+        table_meta: Метаданные таблицы
+        count: Количество ID
+
+    Returns:
+        Первый выделенный ID
+    """
+    first_id = table_meta.get("next_id", 1)
+    rows = load_table_rows(table_name)
+    loaded = get_table_load_version(table_name)
+    if table_meta.get("_next_id_checked") != loaded:
+        first_id = max(first_id, max(rows, default=0) + 1)
+        table_meta["_next_id_checked"] = loaded
+    table_meta["next_id"] = first_id + count
+    return first_id
 
 
 @handle_db_errors
@@ -195,6 +498,9 @@ def insert(
     """
     Вставляет новую запись в таблицу.
 
+    ID берется из счетчика next_id в метаданных таблицы; вызывающий код
+    должен сохранить метаданные после успешной вставки.
+
     Args:
         metadata: Метаданные БД
         table_name: Имя таблицы
@@ -203,13 +509,13 @@ def insert(
     Returns:
         Tuple: (успех, сообщение)
     """
-    if table_name not in metadata:
+    try:
+        table_meta = metadata[table_name]
+    except KeyError:
         return False, ERROR_TABLE_NOT_EXISTS.format(table_name)
 
-    table_data = load_table_data(table_name)
-
-    column_types = get_column_types(metadata, table_name)
-    data_columns = list(column_types.keys())[1:]  # без ID
+    _prepare_table_meta(table_meta)
+    data_columns = table_meta["_data_columns"]
 
     if len(values) != len(data_columns):
         expected = len(data_columns)
@@ -217,23 +523,88 @@ def insert(
         error_msg = ERROR_WRONG_VALUE_COUNT.format(expected, actual)
         return False, error_msg
 
-    if not validate_data_types(values, column_types):
-        return False, ERROR_TYPE_MISMATCH
+    new_id = _allocate_ids(table_name, table_meta, 1)
+    new_row = table_meta["_insert_fn"](values, new_id)
+    if not new_row:
+        table_meta["next_id"] = new_id
+        return False, _row_error(new_row, values)
+
+    try:
+        _write_log(
+            table_name,
+            table_meta["_col_idx"],
+            [{"op": "i", "row": new_row}],
+            [(None, new_row)],
+        )
+    except Exception:
+        table_meta["next_id"] = new_id
+        raise
+
+    return True, SUCCESS_RECORD_ADDED.format(new_id, table_name)
 
-    new_id = 1
-    if table_data:
-        ids = [record.get("ID", 0) for record in table_data]
-        new_id = max(ids) + 1
 
-    new_record = {"ID": new_id}
-    for col_name, value in zip(data_columns, values):
-        new_record[col_name] = value
+@handle_db_errors
+@log_time
+def insert_many(
+        metadata: Dict[str, Any],
+        table_name: str,
+        rows: List[List[Any]]
+) -> Tuple[bool, str, List[int]]:
+    """
+    Вставляет несколько записей одной записью в журнал.
 
-    table_data.append(new_record)
+    Все строки проверяются до записи: при ошибке в любой из них
+    таблица не изменяется. Метаданные сохраняет вызывающий код.
 
-    save_table_data(table_name, table_data)
+    Args:
+        metadata: Метаданные БД
+        table_name: Имя таблицы
+        rows: Список строк, каждая - список значений (без ID)
 
-    return True, SUCCESS_RECORD_ADDED.format(new_id, table_name)
+    Returns:
+        Tuple: (успех, сообщение, ID добавленных записей)
+    """
+    try:
+        table_meta = metadata[table_name]
+    except KeyError:
+        return False, ERROR_TABLE_NOT_EXISTS.format(table_name), []
+
+    _prepare_table_meta(table_meta)
+    data_columns = table_meta["_data_columns"]
+    insert_fn = table_meta["_insert_fn"]
+
+    if not rows:
+        return True, "", []
+
+    first_id = _allocate_ids(table_name, table_meta, len(rows))
+    new_ids = list(range(first_id, first_id + len(rows)))
+
+    new_rows = []
+    for row_num, (new_id, values) in enumerate(zip(new_ids, rows), 1):
+        if len(values) != len(data_columns):
+            table_meta["next_id"] = first_id
+            error_msg = ERROR_WRONG_VALUE_COUNT.format(len(data_columns), len(values))
+            return False, ERROR_IN_ROW.format(row_num, error_msg), []
+        new_row = insert_fn(values, new_id)
+        if not new_row:
+            table_meta["next_id"] = first_id
+            return False, ERROR_IN_ROW.format(row_num, _row_error(new_row, values)), []
+        new_rows.append(new_row)
+
+    entries = [{"op": "i", "row": new_row} for new_row in new_rows]
+    try:
+        _write_log(
+            table_name,
+            table_meta["_col_idx"],
+            entries,
+            [(None, new_row) for new_row in new_rows],
+        )
+    except Exception:
+        table_meta["next_id"] = first_id
+        raise
+
+    ids_str = ", ".join(map(str, new_ids))
+    return True, SUCCESS_RECORDS_ADDED.format(ids_str, table_name), new_ids
 
 
 @handle_db_errors
@@ -254,48 +625,75 @@ def select(
     Returns:
         Tuple: (успех, сообщение, данные)
     """
-    cache_key = f"select_{table_name}_{str(where_clause)}"
+    try:
+        table_meta = metadata[table_name]
+    except KeyError:
+        return False, ERROR_TABLE_NOT_EXISTS.format(table_name), []
+
+    columns = _prepare_table_meta(table_meta)["_columns"]
+    rows = load_table_rows(table_name)
 
-    def execute_select():
-        if table_name not in metadata:
-            return False, ERROR_TABLE_NOT_EXISTS.format(table_name), []
+    if not rows:
+        return True, f'Таблица "{table_name}" пуста.', []
 
-        table_data = load_table_data(table_name)
+    if where_clause:
+        where_items = tuple(sorted(where_clause.items()))
+        version = get_table_version(table_name)
+        found = _select_cached(table_name, version, columns, where_items)
 
-        if not table_data:
-            return True, f'Таблица "{table_name}" пуста.', []
+        if not found:
+            return True, "Записи не найдены.", []
 
-        if where_clause:
-            filtered_data = []
-            for record in table_data:
-                match = True
-                for column, value in where_clause.items():
-                    if record.get(column) != value:
-                        match = False
-                        break
-                if match:
-                    filtered_data.append(record)
+        # Словари создаются заново: изменение записей вызывающим кодом
+        # не затрагивает закэшированный результат
+        return True, "", [dict(zip(columns, row)) for row in found]
 
-            if not filtered_data:
-                return True, "Записи не найдены.", []
+    return True, "", [dict(zip(columns, row)) for row in rows.values()]
+
+
+@functools.lru_cache(maxsize=256)
+def _select_cached(
+        table_name: str,
+        version: int,
+        columns: Tuple[str, ...],
+        where_items: Tuple[Tuple[str, Any], ...]
+) -> Tuple[Tuple[Any, ...], ...]:
+    """
+    Выбирает строки по условию с кэшированием результата.
 
-            return True, "", filtered_data
+    Версия данных таблицы входит в ключ кэша, поэтому после любой
+    записи в таблицу старые результаты перестают использоваться.
 
-        return True, "", table_data
+    Args:
+        table_name: Имя таблицы
+        version: Версия данных таблицы (ключ кэша)
+        columns: Столбцы таблицы по порядку
+        where_items: Условие в виде отсортированных пар (столбец, значение)
 
-    return cacher(cache_key, execute_select)
+    Returns:
+        Кортеж подходящих строк (неизменяемых кортежей) в порядке ID
+    """
+    rows = load_table_rows(table_name)
+    col_idx = {name: i for i, name in enumerate(columns)}
+    found_ids = _indexed_ids(table_name, col_idx, rows, dict(where_items))
+    return tuple(rows[rid] for rid in sorted(found_ids))
 
 
 def format_table_output(
         data: List[Dict[str, Any]],
-        columns: List[Dict[str, str]]
+        columns: List[Dict[str, str]],
+        pretty: bool = False
 ) -> str:
     """
     Форматирует данные таблицы для вывода.
 
+    По умолчанию таблица строится напрямую из строк за один проход по
+    данным; вид совпадает с PrettyTable для однострочных значений.
+
     Args:
         data: Данные для вывода
         columns: Столбцы таблицы
+        pretty: Строить таблицу через PrettyTable
 
     Returns:
         Отформатированная строка таблицы
@@ -303,26 +701,113 @@ def format_table_output(
     if not data:
         return "Нет данных для отображения."
 
+    if not pretty:
+        return _render_table(data, columns)
+
     table = PrettyTable()
 
     column_names = [col["name"] for col in columns]
     table.field_names = column_names
 
     for col in columns:
-        if col["type"] == "int":
-            table.align[col["name"]] = "r"
-        elif col["type"] == "str":
-            table.align[col["name"]] = "l"
-        elif col["type"] == "bool":
-            table.align[col["name"]] = "c"
+        code = _TYPE_CODES.get(col["type"])
+        if code is not None:
+            table.align[col["name"]] = _ALIGN[code]
 
-    for record in data:
-        row = [record.get(col["name"], "") for col in columns]
-        table.add_row(row)
+    table.add_rows(
+        [[record.get(name, "") for name in column_names] for record in data]
+    )
 
     return str(table)
 
 
+def _text_width(text: str) -> int:
+    """
+    Возвращает ширину строки в терминале, как ее считает PrettyTable.
+
+    Широкие символы (например, иероглифы) занимают две позиции. Без
+    библиотеки wcwidth (ее устанавливает prettytable) ширина равна
+    длине строки.
+
+    Args:
+        text: Строка
+
+    Returns:
+        Число позиций в терминале
+    """
+    if wcwidth is None or text.isascii():
+        return len(text)
+    width = wcwidth.wcswidth(text)
+    # -1 - в строке есть управляющие символы
+    return width if width >= 0 else len(text)
+
+
+def _justify(text: str, text_width: int, width: int, align: str) -> str:
+    """
+    Дополняет строку пробелами до заданной ширины в терминале.
+
+    Центрирование повторяет str.center, которым пользуется PrettyTable.
+
+    Args:
+        text: Строка
+        text_width: Ширина строки в терминале
+        width: Требуемая ширина
+        align: Выравнивание ("l", "r" или "c")
+
+    Returns:
+        Выровненная строка
+    """
+    pad = width - text_width
+    if align == "l":
+        return text + " " * pad
+    if align == "r":
+        return " " * pad + text
+    left = pad // 2 + (pad & width & 1)
+    return " " * left + text + " " * (pad - left)
+
+
+def _render_table(
+        data: List[Dict[str, Any]],
+        columns: List[Dict[str, str]]
+) -> str:
+    """
+    Строит текстовую таблицу в стиле PrettyTable без самой библиотеки.
+
+    Ширина ячеек считается в позициях терминала, поэтому строки
+    с широкими символами выравниваются так же, как в PrettyTable.
+
+    Args:
+        data: Данные для вывода
+        columns: Столбцы таблицы
+
+    Returns:
+        Отформатированная строка таблицы
+    """
+    column_names = [col["name"] for col in columns]
+    aligns = []
+    for col in columns:
+        code = _TYPE_CODES.get(col["type"])
+        aligns.append(_ALIGN[code] if code is not None else "c")
+
+    cells = [[str(record.get(name, "")) for name in column_names] for record in data]
+    cell_widths = [list(map(_text_width, row)) for row in cells]
+    header_widths = list(map(_text_width, column_names))
+    widths = header_widths
+    for row_widths in cell_widths:
+        widths = list(map(max, widths, row_widths))
+
+    def render(row: List[str], row_widths: List[int]) -> str:
+        return "| " + " | ".join(
+            map(_justify, row, row_widths, widths, aligns)
+        ) + " |"
+
+    border = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    lines = [border, render(column_names, header_widths), border]
+    lines.extend(map(render, cells, cell_widths))
+    lines.append(border)
+    return "\n".join(lines)
+
+
 @handle_db_errors
 def update(
         metadata: Dict[str, Any],
@@ -342,39 +827,45 @@ def update(
     Returns:
         Tuple: (успех, сообщение)
     """
-    if table_name not in metadata:
+    try:
+        table_meta = metadata[table_name]
+    except KeyError:
         return False, ERROR_TABLE_NOT_EXISTS.format(table_name)
 
-    column_types = get_column_types(metadata, table_name)
-    for col in list(set_clause.keys()) + list(where_clause.keys()):
-        if col not in column_types:
-            return False, f'Столбец "{col}" не существует в таблице "{table_name}".'
+    col_idx = _prepare_table_meta(table_meta)["_col_idx"]
+    missing = (set_clause.keys() | where_clause.keys()) - col_idx.keys()
+    if missing:
+        col = next(c for c in (*set_clause, *where_clause) if c in missing)
+        return False, f'Столбец "{col}" не существует в таблице "{table_name}".'
 
-    table_data = load_table_data(table_name)
+    if "ID" in set_clause:
+        # ID - ключ строк в журнале и кэше, его изменение их рассогласует
+        return False, ERROR_ID_READONLY
 
-    if not table_data:
-        return False, f'Таблица "{table_name}" пуста.'
+    for value in set_clause.values():
+        if _out_of_range(value):
+            return False, ERROR_INT_OUT_OF_RANGE.format(value, INT_MIN, INT_MAX)
 
-    updated_count = 0
-    updated_ids = []
+    rows = load_table_rows(table_name)
 
-    for record in table_data:
-        match = True
-        for column, value in where_clause.items():
-            if record.get(column) != value:
-                match = False
-                break
+    if not rows:
+        return False, f'Таблица "{table_name}" пуста.'
 
-        if match:
-            for column, new_value in set_clause.items():
-                record[column] = new_value
-            updated_count += 1
-            updated_ids.append(record["ID"])
+    updated_ids = sorted(_indexed_ids(table_name, col_idx, rows, where_clause))
 
-    if updated_count == 0:
+    if not updated_ids:
         return False, "Записи не найдены по заданному условию."
 
-    save_table_data(table_name, table_data)
+    patch = [[col_idx[column], value] for column, value in set_clause.items()]
+    changes = [(rows[rid], apply_patch(rows[rid], patch)) for rid in updated_ids]
+
+    _write_log(
+        table_name,
+        col_idx,
+        [{"op": "u", "ids": updated_ids, "set": patch}],
+        changes,
+        set_clause,
+    )
 
     ids_str = ", ".join(map(str, updated_ids))
     return True, SUCCESS_RECORD_UPDATED.format(ids_str, table_name)
@@ -390,6 +881,8 @@ def delete(
     """
     Удаляет записи из таблицы.
 
+    Запрашивает подтверждение; передайте force=True, чтобы пропустить его.
+
     Args:
         metadata: Метаданные БД
         table_name: Имя таблицы
@@ -398,33 +891,72 @@ def delete(
     Returns:
         Tuple: (успех, сообщение)
     """
-    if table_name not in metadata:
+    try:
+        table_meta = metadata[table_name]
+    except KeyError:
         return False, ERROR_TABLE_NOT_EXISTS.format(table_name)
 
-    table_data = load_table_data(table_name)
+    col_idx = _prepare_table_meta(table_meta)["_col_idx"]
 
-    if not table_data:
+    rows = load_table_rows(table_name)
+
+    if not rows:
         return False, f'Таблица "{table_name}" пуста.'
 
-    records_to_keep = []
-    deleted_ids = []
+    deleted_ids = sorted(_indexed_ids(table_name, col_idx, rows, where_clause))
+
+    if not deleted_ids:
+        return False, "Записи не найдены по заданному условию."
+
+    changes = [(rows[rid], None) for rid in deleted_ids]
+    _write_log(table_name, col_idx, [{"op": "d", "ids": deleted_ids}], changes)
 
-    for record in table_data:
-        match = True
-        for column, value in where_clause.items():
-            if record.get(column) != value:
-                match = False
-                break
+    ids_str = ", ".join(map(str, deleted_ids))
+    return True, SUCCESS_RECORD_DELETED.format(ids_str, table_name)
 
-        if match:
-            deleted_ids.append(record["ID"])
-        else:
-            records_to_keep.append(record)
 
-    if not deleted_ids:
+@handle_db_errors
+@confirm_action(CONFIRM_DELETE_RECORDS)
+def delete_many(
+        metadata: Dict[str, Any],
+        table_name: str,
+        where_clauses: List[Dict[str, Any]]
+) -> Tuple[bool, str]:
+    """
+    Удаляет записи, подходящие под любое из условий, одной записью в журнал.
+
+    Запрашивает подтверждение; передайте force=True, чтобы пропустить его.
+
+    Args:
+        metadata: Метаданные БД
+        table_name: Имя таблицы
+        where_clauses: Список условий для выбора записей
+
+    Returns:
+        Tuple: (успех, сообщение)
+    """
+    try:
+        table_meta = metadata[table_name]
+    except KeyError:
+        return False, ERROR_TABLE_NOT_EXISTS.format(table_name)
+
+    col_idx = _prepare_table_meta(table_meta)["_col_idx"]
+
+    rows = load_table_rows(table_name)
+
+    if not rows:
+        return False, f'Таблица "{table_name}" пуста.'
+
+    found_ids: Set[int] = set()
+    for where_clause in where_clauses:
+        found_ids |= _indexed_ids(table_name, col_idx, rows, where_clause)
+
+    if not found_ids:
         return False, "Записи не найдены по заданному условию."
 
-    save_table_data(table_name, records_to_keep)
+    deleted_ids = sorted(found_ids)
+    changes = [(rows[rid], None) for rid in deleted_ids]
+    _write_log(table_name, col_idx, [{"op": "d", "ids": deleted_ids}], changes)
 
     ids_str = ", ".join(map(str, deleted_ids))
     return True, SUCCESS_RECORD_DELETED.format(ids_str, table_name)
@@ -445,13 +977,12 @@ def table_info(
     Returns:
         Tuple: (успех, сообщение)
     """
-    if table_name not in metadata:
+    try:
+        columns = metadata[table_name]["columns"]
+    except KeyError:
         return False, ERROR_TABLE_NOT_EXISTS.format(table_name)
 
-    table_data = load_table_data(table_name)
-    record_count = len(table_data)
-
-    columns = metadata[table_name]["columns"]
+    record_count = len(load_table_rows(table_name))
     columns_str = ", ".join([f"{c['name']}:{c['type']}" for c in columns])
 
     info_lines = [
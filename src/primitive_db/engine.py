@@ -1,8 +1,7 @@
 """Движок базы данных - обработка команд и основной цикл."""
+import re
 import shlex
-from typing import List
-
-import prompt
+from typing import Callable, Dict, List, Optional
 
 from src.decorators import handle_db_errors
 
@@ -19,7 +18,16 @@ from .core import (
     validate_column_format,
 )
 from .parser import parse_insert_values, parse_set_clause, parse_where_condition
-from .utils import load_metadata, save_metadata
+from .utils import flush_all, load_metadata, save_metadata
+
+# Начало команды: ключевые слова без учета регистра
+_VERB_RE = re.compile(
+    r'\s*(insert\s+into|select\s+from|delete\s+from|update|info|create_table'
+    r'|drop_table|list_tables|help|exit)(?=\s|$)',
+    re.IGNORECASE,
+)
+# Имена команд для составных ключевых слов
+_VERBS = {"insert into": "insert", "select from": "select", "delete from": "delete"}
 
 
 def print_help() -> None:
@@ -79,42 +87,28 @@ def parse_complex_command(full_command: str) -> tuple[str, List[str]]:
     """
     Парсит сложные команды с несколькими частями.
 
+    Регистр не учитывается только в ключевых словах команды; имена
+    таблиц, столбцов и значения передаются как введены.
+
     Args:
         full_command: Полная команда пользователя
 
     Returns:
         Tuple: (базовая_команда, аргументы)
     """
-    parts = full_command.lower().split()
-    if not parts:
-        return "", []
+    match = _VERB_RE.match(full_command)
+    if match is None:
+        parts = full_command.split()
+        if not parts:
+            return "", []
+        return parts[0].lower(), parts[1:]
 
-    if len(parts) >= 4 and parts[0] == "insert" and parts[1] == "into":
-        return "insert", parts[2:]
-    elif len(parts) >= 3 and parts[0] == "select" and parts[1] == "from":
-        return "select", parts[2:]
-    elif len(parts) >= 2 and parts[0] == "update":
-        return "update", parts[1:]
-    elif len(parts) >= 4 and parts[0] == "delete" and parts[1] == "from":
-        return "delete", parts[2:]
-    elif len(parts) >= 2 and parts[0] == "info":
-        return "info", parts[1:]
-    elif len(parts) >= 2 and parts[0] == "create_table":
-        return "create_table", parts[1:]
-    elif len(parts) >= 2 and parts[0] == "drop_table":
-        return "drop_table", parts[1:]
-    elif len(parts) == 1 and parts[0] == "list_tables":
-        return "list_tables", []
-    elif len(parts) == 1 and parts[0] == "help":
-        return "help", []
-    elif len(parts) == 1 and parts[0] == "exit":
-        return "exit", []
-    else:
-        return parts[0], parts[1:]
+    verb = " ".join(match.group(1).lower().split())
+    return _VERBS.get(verb, verb), full_command[match.end():].split()
 
 
 @handle_db_errors
-def handle_insert(args: List[str]) -> str:
+def handle_insert(args: List[str]) -> Optional[str]:
     """Обрабатывает команду insert into."""
     if len(args) < 2:
         return "Ошибка: Неверный формат команды."
@@ -133,13 +127,20 @@ def handle_insert(args: List[str]) -> str:
         return f"Ошибка: {e}"
 
     metadata = load_metadata()
-    success, message = insert(metadata, table_name, values)
+    result = insert(metadata, table_name, values)
+    if result is None:
+        # Ошибка или отмена уже выведены декораторами
+        return None
+    success, message = result
+
+    if success:
+        save_metadata(metadata)
 
     return message if message else "Операция выполнена успешно."
 
 
 @handle_db_errors
-def handle_select(args: List[str]) -> str:
+def handle_select(args: List[str]) -> Optional[str]:
     """Обрабатывает команду select from."""
     if len(args) < 1:
         return "Ошибка: Неверный формат команды."
@@ -158,7 +159,11 @@ def handle_select(args: List[str]) -> str:
             return f"Ошибка: {e}"
 
     metadata = load_metadata()
-    success, message, data = select(metadata, table_name, where_clause)
+    result = select(metadata, table_name, where_clause)
+    if result is None:
+        # Ошибка уже выведена декоратором
+        return None
+    success, message, data = result
 
     if not success:
         return message if message else "Ошибка выполнения запроса."
@@ -171,20 +176,21 @@ def handle_select(args: List[str]) -> str:
 
 
 @handle_db_errors
-def handle_update(args: List[str]) -> str:
+def handle_update(args: List[str]) -> Optional[str]:
     """Обрабатывает команду update."""
     if len(args) < 4:
         return "Ошибка: Неверный формат команды."
 
     table_name = args[0]
+    keywords = [arg.lower() for arg in args]
 
     try:
-        set_idx = args.index("set")
+        set_idx = keywords.index("set")
     except ValueError:
         return "Ошибка: Отсутствует ключевое слово SET."
 
     try:
-        where_idx = args.index("where")
+        where_idx = keywords.index("where")
     except ValueError:
         return "Ошибка: Отсутствует ключевое слово WHERE."
 
@@ -207,13 +213,17 @@ def handle_update(args: List[str]) -> str:
         return "Ошибка: Отсутствует условие WHERE."
 
     metadata = load_metadata()
-    success, message = update(metadata, table_name, set_clause, where_clause)
+    result = update(metadata, table_name, set_clause, where_clause)
+    if result is None:
+        # Ошибка или отмена уже выведены декораторами
+        return None
+    success, message = result
 
     return message if message else "Операция выполнена успешно."
 
 
 @handle_db_errors
-def handle_delete(args: List[str]) -> str:
+def handle_delete(args: List[str]) -> Optional[str]:
     """Обрабатывает команду delete from."""
     if len(args) < 3:
         return "Ошибка: Неверный формат команды."
@@ -233,20 +243,28 @@ def handle_delete(args: List[str]) -> str:
         return "Ошибка: Отсутствует условие WHERE."
 
     metadata = load_metadata()
-    success, message = delete(metadata, table_name, where_clause)
+    result = delete(metadata, table_name, where_clause)
+    if result is None:
+        # Ошибка или отмена уже выведены декораторами
+        return None
+    success, message = result
 
     return message if message else "Операция выполнена успешно."
 
 
 @handle_db_errors
-def handle_info(args: List[str]) -> str:
+def handle_info(args: List[str]) -> Optional[str]:
     """Обрабатывает команду info."""
     if len(args) != 1:
         return "Ошибка: Используйте: info <имя_таблицы>"
 
     table_name = args[0]
     metadata = load_metadata()
-    success, message = table_info(metadata, table_name)
+    result = table_info(metadata, table_name)
+    if result is None:
+        # Ошибка уже выведена декоратором
+        return None
+    success, message = result
 
     return message if message else "Информация не найдена."
 
@@ -289,6 +307,31 @@ def handle_drop_table(args: List[str]) -> str:
     return message if message else "Таблица удалена успешно."
 
 
+def handle_list_tables(args: List[str]) -> str:
+    """Обрабатывает команду list_tables."""
+    return list_tables(load_metadata())
+
+
+def handle_help(args: List[str]) -> Optional[str]:
+    """Обрабатывает команду help."""
+    print_help()
+    return None
+
+
+# Обработчики команд по имени команды
+_HANDLERS: Dict[str, Callable[[List[str]], Optional[str]]] = {
+    "help": handle_help,
+    "create_table": handle_create_table,
+    "drop_table": handle_drop_table,
+    "list_tables": handle_list_tables,
+    "insert": handle_insert,
+    "select": handle_select,
+    "update": handle_update,
+    "delete": handle_delete,
+    "info": handle_info,
+}
+
+
 @handle_db_errors
 def run() -> None:
     """Основной цикл выполнения программы."""
@@ -296,7 +339,7 @@ def run() -> None:
 
     while True:
         try:
-            user_input = prompt.string("Введите команду: ").strip()
+            user_input = input("Введите команду: ").strip()
 
             if not user_input:
                 print("Пожалуйста, введите команду. Используйте 'help' для справки.")
@@ -310,57 +353,23 @@ def run() -> None:
 
             if command == "exit":
                 print("Выход из программы...")
+                flush_all()
                 break
 
-            elif command == "help":
-                print_help()
-
-            elif command == "create_table":
-                result = handle_create_table(args)
-                if result:
-                    print(result)
-
-            elif command == "drop_table":
-                result = handle_drop_table(args)
-                if result:
-                    print(result)
+            handler = _HANDLERS.get(command)
+            if handler is None:
+                print(f"Функции '{command}' нет. Попробуйте снова.")
+                continue
 
-            elif command == "list_tables":
-                metadata = load_metadata()
-                result = list_tables(metadata)
+            result = handler(args)
+            if result:
                 print(result)
 
-            elif command == "insert":
-                result = handle_insert(args)
-                if result:
-                    print(result)
-
-            elif command == "select":
-                result = handle_select(args)
-                if result:
-                    print(result)
-
-            elif command == "update":
-                result = handle_update(args)
-                if result:
-                    print(result)
-
-            elif command == "delete":
-                result = handle_delete(args)
-                if result:
-                    print(result)
-
-            elif command == "info":
-                result = handle_info(args)
-                if result:
-                    print(result)
-
-            else:
-                print(f"Функции '{command}' нет. Попробуйте снова.")
-
         except KeyboardInterrupt:
             print("\n\nПрограмма прервана. Используйте 'exit' для выхода.")
+            flush_all()
             break
         except EOFError:
             print("\nВыход из программы...")
+            flush_all()
             break
\ No newline at end of file
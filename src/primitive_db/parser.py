@@ -1,9 +1,68 @@
 """Парсеры для разбора условий WHERE и SET."""
-import shlex
-from typing import Any, Dict, Optional
+import functools
+import re
+import sys
+from typing import Any, Dict, List, Optional
 
 from src.decorators import handle_db_errors
 
+# Часть токена: строка в двойных кавычках (внутри \ экранирует " и \),
+# строка в одинарных кавычках, экранированный символ или обычный символ
+_PIECE = r'"(?:[^"\\]|\\.)*"|\'[^\']*\'|\\.|[^\s"\'\\{}]'
+# Токен - слитные части, как в shlex.split; вторая группа ловит
+# незакрытую кавычку или обратную косую черту в конце строки
+_TOKEN_RE = re.compile(rf'((?:{_PIECE.format("")})+)|(["\'\\])')
+# То же для списка значений INSERT, где запятая тоже разделяет токены
+_VALUE_RE = re.compile(rf'((?:{_PIECE.format(",")})+)|(["\'\\])')
+# Снятие кавычек и экранирования с частей токена
+_UNQUOTE_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|\'([^\']*)\'|\\(.)')
+_ESCAPE_RE = re.compile(r'\\(["\\])')
+
+
+def _unquote(match: re.Match) -> str:
+    """
+    Снимает кавычки или экранирование с одной части токена.
+
+    Args:
+        match: Совпадение _UNQUOTE_RE
+
+    Returns:
+        Значение части
+    """
+    double, single, escaped = match.groups()
+    if double is not None:
+        return _ESCAPE_RE.sub(r'\1', double)
+    return single if single is not None else escaped
+
+
+def _split(text: str, pattern: re.Pattern = _TOKEN_RE) -> List[str]:
+    """
+    Разбивает строку на токены по правилам shlex.split.
+
+    Кавычки снимаются, а слитные части склеиваются: b"c d" дает "bc d".
+    Обратная косая черта экранирует следующий символ, а внутри двойных
+    кавычек - только " и \\.
+
+    Args:
+        text: Исходная строка
+        pattern: Регулярное выражение токена
+
+    Returns:
+        Список токенов
+
+    Raises:
+        ValueError: Незакрытая кавычка или \\ в конце строки
+    """
+    tokens = []
+    for match in pattern.finditer(text):
+        token = match.group(1)
+        if token is None:
+            raise ValueError(f"Незакрытая кавычка или \\ в конце строки: {text}")
+        if '"' in token or "'" in token or '\\' in token:
+            token = _UNQUOTE_RE.sub(_unquote, token)
+        tokens.append(token)
+    return tokens
+
 
 @handle_db_errors
 def parse_where_condition(where_str: str) -> Optional[Dict[str, Any]]:
@@ -20,11 +79,11 @@ def parse_where_condition(where_str: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        parts = shlex.split(where_str)
+        parts = _split(where_str)
         if len(parts) != 3 or parts[1] != '=':
             raise ValueError(f"Неверный формат условия WHERE: {where_str}")
 
-        column = parts[0]
+        column = sys.intern(parts[0])
         value_str = parts[2]
 
         value = parse_value(value_str)
@@ -46,11 +105,11 @@ def parse_set_clause(set_str: str) -> Dict[str, Any]:
         Словарь {column: value}
     """
     try:
-        parts = shlex.split(set_str)
+        parts = _split(set_str)
         if len(parts) != 3 or parts[1] != '=':
             raise ValueError(f"Неверный формат SET: {set_str}")
 
-        column = parts[0]
+        column = sys.intern(parts[0])
         value_str = parts[2]
 
         value = parse_value(value_str)
@@ -60,11 +119,14 @@ def parse_set_clause(set_str: str) -> Dict[str, Any]:
         raise ValueError(f"Ошибка парсинга SET: {e}")
 
 
+@functools.lru_cache(maxsize=2048)
 @handle_db_errors
 def parse_value(value_str: str) -> Any:
     """
     Парсит строковое значение в соответствующий тип Python.
 
+    Результаты кэшируются: повторяющиеся литералы разбираются один раз.
+
     Args:
         value_str: Строковое представление значения
 
@@ -73,15 +135,18 @@ def parse_value(value_str: str) -> Any:
     """
     value_str = value_str.strip()
 
-    if value_str.lower() == 'true':
+    lowered = value_str.lower()
+    if lowered == 'true':
         return True
-    elif value_str.lower() == 'false':
+    elif lowered == 'false':
         return False
 
-    try:
-        return int(value_str)
-    except ValueError:
-        pass
+    # int() пробуется только для строк, похожих на число
+    if value_str[:1].isdigit() or (value_str[:1] in '+-' and len(value_str) > 1):
+        try:
+            return int(value_str)
+        except ValueError:
+            pass
 
     if (value_str.startswith('"') and value_str.endswith('"')) or \
             (value_str.startswith("'") and value_str.endswith("'")):
@@ -106,7 +171,7 @@ def parse_insert_values(values_str: str) -> list:
         if values_str.startswith('(') and values_str.endswith(')'):
             values_str = values_str[1:-1]
 
-        parts = shlex.split(values_str.replace(',', ' '))
+        parts = _split(values_str, _VALUE_RE)
         return [parse_value(p) for p in parts]
     except Exception as e:
         raise ValueError(f"Ошибка парсинга значений: {e}")
\ No newline at end of file
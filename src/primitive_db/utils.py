@@ -1,18 +1,82 @@
 """Вспомогательные функции для работы с файлами."""
+import atexit
+import functools
+import itertools
 import json
+import os
+import re
+import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
 
-from src.constants import DATA_DIR, META_FILE
+from src.constants import (
+    DATA_DIR,
+    LOG_COMPACT_RATIO,
+    LOG_FSYNC_THRESHOLD,
+    META_FILE,
+)
 from src.decorators import handle_db_errors
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 19 цифр подряд: возможное целое за пределами 64 бит
+_LONG_DIGITS_RE = re.compile(rb"\d{19}")
+
+# Открытые на дозапись журналы таблиц
+_LOG_HANDLES: Dict[str, IO[bytes]] = {}
+# Количество записей, дописанных с последнего fsync
+_PENDING_FSYNC: Dict[str, int] = {}
+# Статистика журналов: [всего измененных строк, из них патчей и удалений]
+_LOG_STATS: Dict[str, List[int]] = {}
+# Разобранные таблицы (строки-кортежи по ID) и сигнатуры их журналов
+_TABLE_CACHE: Dict[str, Dict[int, Tuple[Any, ...]]] = {}
+_TABLE_STAT: Dict[str, Tuple[int, int]] = {}
+# Версия данных таблицы, меняется при каждом изменении кэша
+_TABLE_VERSION: Dict[str, int] = {}
+# Версия данных на момент последнего чтения таблицы с диска
+_TABLE_LOADED: Dict[str, int] = {}
+_VERSION_COUNTER = itertools.count(1)
+# Директория data, созданная этим процессом (None - еще не создавалась)
+_DATA_DIR_PATH: Optional[Path] = None
+# Разобранные метаданные по пути файла: (сигнатура файла, метаданные)
+_META_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+# Последнее записанное содержимое файлов метаданных
+_META_WRITTEN: Dict[str, bytes] = {}
+
+
+def _file_signature(stat: os.stat_result) -> Tuple[int, int]:
+    """
+    Возвращает сигнатуру файла для проверки актуальности кэша.
+
+    Размер дополняет время изменения: запись, уложившаяся в тот же
+    квант времени файловой системы, все равно меняет размер.
+
+    Args:
+        stat: Результат os.stat / os.fstat
+
+    Returns:
+        Tuple: (время_изменения_нс, размер)
+    """
+    return stat.st_mtime_ns, stat.st_size
+
 
 @handle_db_errors
 def ensure_data_dir() -> Path:
-    """Создает директорию data, если она не существует."""
-    data_dir = Path(DATA_DIR)
-    data_dir.mkdir(exist_ok=True)
-    return data_dir
+    """
+    Создает директорию data, если она не существует.
+
+    mkdir выполняется один раз за процесс; дальше возвращается тот же
+    объект Path.
+    """
+    global _DATA_DIR_PATH
+    if _DATA_DIR_PATH is None:
+        data_dir = Path(DATA_DIR)
+        data_dir.mkdir(exist_ok=True)
+        _DATA_DIR_PATH = data_dir
+    return _DATA_DIR_PATH
 
 
 @handle_db_errors
@@ -20,6 +84,12 @@ def load_metadata(filepath: str = META_FILE) -> Dict[str, Any]:
     """
     Загружает метаданные из JSON-файла.
 
+    Разобранные метаданные хранятся в памяти и перечитываются, только
+    если файл изменился. Возвращаемый словарь общий для всех вызовов:
+    изменения в нем нужно сохранять через save_metadata. Имена и типы
+    столбцов интернируются, чтобы поиск по ним в словарях сравнивал
+    строки по ссылке.
+
     Args:
         filepath: Путь к файлу с метаданными
 
@@ -27,82 +97,581 @@ def load_metadata(filepath: str = META_FILE) -> Dict[str, Any]:
         Словарь с метаданными или пустой словарь
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        signature = _file_signature(os.stat(filepath))
     except FileNotFoundError:
+        _META_CACHE.pop(filepath, None)
         return {}
 
+    cached = _META_CACHE.get(filepath)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with open(filepath, 'rb') as f:
+        data = _loads(f.read())
+    for table_meta in data.values():
+        for column in table_meta["columns"]:
+            column["name"] = sys.intern(column["name"])
+            column["type"] = sys.intern(column["type"])
+    _META_CACHE[filepath] = (signature, data)
+    return data
+
 
 @handle_db_errors
-def save_metadata(data: Dict[str, Any], filepath: str = META_FILE) -> None:
+def save_metadata(
+        data: Dict[str, Any],
+        filepath: str = META_FILE,
+        pretty: bool = False,
+        durable: bool = False
+) -> None:
     """
     Сохраняет метаданные в JSON-файл.
 
+    Ключи таблиц, начинающиеся с "_", считаются производными (вычисляются
+    в памяти) и в файл не записываются. По умолчанию JSON пишется
+    компактно, без отступов. Файл заменяется атомарно; fsync по
+    умолчанию не выполняется, так как отставший счетчик next_id
+    восстанавливается по журналу таблицы. Если содержимое совпадает с
+    последней записью и файл с тех пор не менялся, запись пропускается.
+
     Args:
         data: Словарь с метаданными
         filepath: Путь к файлу для сохранения
+        pretty: Форматировать JSON с отступами для чтения человеком
+        durable: Сбросить файл на диск перед заменой
     """
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    stored = {
+        table_name: {k: v for k, v in table_meta.items() if not k.startswith("_")}
+        for table_name, table_meta in data.items()
+    }
+    content = _dumps(stored, indent=pretty)
 
+    cached = _META_CACHE.get(filepath)
+    if cached is not None and _META_WRITTEN.get(filepath) == content:
+        try:
+            signature = _file_signature(os.stat(filepath))
+        except FileNotFoundError:
+            signature = None
+        if signature == cached[0]:
+            _META_CACHE[filepath] = (signature, data)
+            return
 
+    _atomic_write(filepath, content, durable)
+    _META_CACHE[filepath] = (_file_signature(os.stat(filepath)), data)
+    _META_WRITTEN[filepath] = content
+
+
+@functools.lru_cache(maxsize=1024)
 def get_table_filepath(table_name: str) -> Path:
     """
-    Возвращает путь к файлу данных таблицы.
+    Возвращает путь к журналу таблицы.
+
+    Пути кэшируются по имени таблицы; get_table_filepath.cache_clear()
+    сбрасывает кэш (например, после смены рабочей директории).
 
     Args:
         table_name: Имя таблицы
 
     Returns:
-        Path к файлу данных
+        Path к файлу журнала
     """
-    ensure_data_dir()
-    return Path(DATA_DIR) / f"{table_name}.json"
+    return ensure_data_dir() / f"{table_name}.log"
 
 
-@handle_db_errors
-def load_table_data(table_name: str) -> List[Dict[str, Any]]:
+def apply_patch(row: Tuple[Any, ...], patch: List[List[Any]]) -> Tuple[Any, ...]:
+    """
+    Возвращает копию строки с измененными значениями.
+
+    Args:
+        row: Строка таблицы (значения в порядке столбцов)
+        patch: Список пар [позиция_столбца, новое_значение]
+
+    Returns:
+        Новая строка
+    """
+    new_row = list(row)
+    for position, value in patch:
+        new_row[position] = value
+    return tuple(new_row)
+
+
+def _apply_entry(rows: Dict[int, Tuple[Any, ...]], entry: Dict[str, Any]) -> None:
+    """
+    Применяет одну запись журнала к состоянию таблицы.
+
+    Строки хранятся позиционно, в порядке столбцов таблицы; ID всегда
+    первый столбец. Обновление и удаление относятся сразу к списку ID.
+
+    Args:
+        rows: Строки таблицы, индексированные по ID
+        entry: Запись журнала ("i" - вставка, "u" - обновление, "d" - удаление)
+    """
+    op = entry["op"]
+    if op == "i":
+        row = tuple(entry["row"])
+        rows[row[0]] = row
+    elif op == "u":
+        patch = entry["set"]
+        for rid in entry["ids"]:
+            row = rows.get(rid)
+            if row is not None:
+                rows[rid] = apply_patch(row, patch)
+    elif op == "d":
+        for rid in entry["ids"]:
+            rows.pop(rid, None)
+
+
+def _entry_weight(entry: Dict[str, Any]) -> int:
+    """
+    Возвращает количество строк, затронутых записью журнала.
+
+    Args:
+        entry: Запись журнала
+
+    Returns:
+        1 для вставки, число ID для обновления и удаления
+    """
+    return 1 if entry["op"] == "i" else len(entry["ids"])
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """
+    Сериализует данные в JSON (UTF-8).
+
+    Использует orjson, если он установлен, иначе стандартный json.
+    Целые числа вне 64 бит orjson не сериализует, для них тоже
+    используется стандартный json с тем же форматом вывода.
+
+    Args:
+        data: Данные для сериализации
+        indent: Форматировать с отступом в 2 пробела
+
+    Returns:
+        JSON в виде байтов
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    # Компактные разделители, как у orjson: файлы не зависят от библиотеки
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """
+    Разбирает JSON из байтов.
+
+    orjson превращает целые числа длиннее 64 бит во float, поэтому
+    данные с длинными последовательностями цифр разбираются стандартным
+    json: результат не зависит от установленной библиотеки.
+
+    Args:
+        data: JSON в виде байтов
+
+    Returns:
+        Разобранные данные
+    """
+    if orjson is not None and _LONG_DIGITS_RE.search(data) is None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _encode_entry(entry: Dict[str, Any]) -> bytes:
+    """
+    Сериализует запись журнала в строку JSONL.
+
+    Args:
+        entry: Запись журнала
+
+    Returns:
+        Байты строки, завершенной переводом строки
+    """
+    return _dumps(entry) + b"\n"
+
+
+def _repair_log_tail(path: Path, data: bytes, tail: bytes) -> None:
+    """
+    Приводит конец журнала к целой строке после аварийного завершения.
+
+    Оборванная последняя запись обрезается, иначе следующая запись
+    склеилась бы с ней в одну неразборчивую строку. Если последняя
+    строка цела, но без перевода строки, он дописывается.
+
+    Args:
+        path: Путь к журналу
+        data: Прочитанное содержимое журнала
+        tail: Оборванная последняя строка (пустая, если ее нет)
+    """
+    if tail:
+        print(
+            f"Предупреждение: последняя запись журнала {path} оборвана, "
+            f"отброшено {len(tail)} байт."
+        )
+        os.truncate(path, len(data) - len(tail))
+    elif data and not data.endswith(b"\n"):
+        with open(path, 'ab') as f:
+            f.write(b"\n")
+
+
+def _replay_log(path: Path) -> Tuple[Dict[int, Tuple[Any, ...]], int, int]:
     """
-    Загружает данные таблицы из JSON-файла.
+    Восстанавливает состояние таблицы, проигрывая ее журнал.
+
+    Оборванная при аварии последняя запись (неразборчивая строка без
+    перевода строки) отбрасывается и обрезается на диске. Поврежденная
+    строка в середине журнала считается ошибкой: файл не изменяется.
+
+    Args:
+        path: Путь к журналу
+
+    Returns:
+        Tuple: (строки_по_ID, всего_изменений, из_них_патчей)
+
+    Raises:
+        ValueError: Журнал поврежден не в последней строке
+    """
+    rows: Dict[int, Tuple[Any, ...]] = {}
+    total = patches = 0
+    data = path.read_bytes()
+    lines = data.splitlines(keepends=True)
+    tail = b""
+    for line_num, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            entry = _loads(line)
+        except ValueError:
+            if line_num == len(lines) and not line.endswith(b"\n"):
+                tail = line
+                break
+            raise ValueError(f"Журнал {path} поврежден в строке {line_num}.")
+        _apply_entry(rows, entry)
+        weight = _entry_weight(entry)
+        total += weight
+        if entry["op"] != "i":
+            patches += weight
+    _repair_log_tail(path, data, tail)
+    return rows, total, patches
+
+
+def _migrate_legacy_table(table_name: str) -> None:
+    """
+    Переводит таблицу из старого формата (JSON-массив) в журнал.
+
+    Args:
+        table_name: Имя таблицы
+    """
+    legacy_path = Path(DATA_DIR) / f"{table_name}.json"
+    if not legacy_path.exists():
+        return
+
+    # Ключи записей шли в порядке столбцов: ID, затем столбцы таблицы
+    records = _loads(legacy_path.read_bytes())
+    # Ошибка записи прерывает миграцию до удаления старого файла
+    _rewrite_log(table_name, [tuple(record.values()) for record in records])
+    legacy_path.unlink()
+
+
+def load_table_rows(table_name: str) -> Dict[int, Tuple[Any, ...]]:
+    """
+    Загружает строки таблицы, индексированные по ID.
+
+    Строки - кортежи значений в порядке столбцов таблицы. Разобранная
+    таблица хранится в памяти и перечитывается с диска, только если
+    журнал был изменен извне. Возвращаемый словарь разделяется с кэшем
+    и не должен изменяться напрямую - изменения записываются через
+    append_table_log.
+
+    Ошибки чтения не перехватываются, чтобы вызывающий код не принял
+    поврежденную таблицу за пустую.
 
     Args:
         table_name: Имя таблицы
 
     Returns:
-        Список записей таблицы или пустой список
+        Словарь {ID: строка} в порядке добавления строк
     """
     filepath = get_table_filepath(table_name)
+    if not filepath.exists():
+        _migrate_legacy_table(table_name)
+
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        signature = _file_signature(os.stat(filepath))
     except FileNotFoundError:
-        return []
+        return {}
+
+    rows = _TABLE_CACHE.get(table_name)
+    if rows is None or _TABLE_STAT.get(table_name) != signature:
+        # Файл мог быть заменен: открытый журнал указывал бы на старый
+        _close_log(table_name)
+        rows, total, patches = _replay_log(filepath)
+        _TABLE_CACHE[table_name] = rows
+        _TABLE_STAT[table_name] = signature
+        _TABLE_VERSION[table_name] = _TABLE_LOADED[table_name] = next(_VERSION_COUNTER)
+        _LOG_STATS[table_name] = [total, patches]
+
+    return rows
+
+
+@handle_db_errors
+def load_table_data(table_name: str) -> List[Tuple[Any, ...]]:
+    """
+    Загружает данные таблицы из журнала.
+
+    Args:
+        table_name: Имя таблицы
+
+    Returns:
+        Список строк таблицы или пустой список
+    """
+    return list(load_table_rows(table_name).values())
+
+
+def get_table_version(table_name: str) -> int:
+    """
+    Возвращает версию закэшированных данных таблицы.
+
+    Версия меняется при каждом изменении данных в кэше, поэтому по ней
+    можно проверять актуальность производных структур (индексов).
+
+    Args:
+        table_name: Имя таблицы
+
+    Returns:
+        Номер версии или 0, если таблица не загружена
+    """
+    return _TABLE_VERSION.get(table_name, 0)
+
+
+def get_table_load_version(table_name: str) -> int:
+    """
+    Возвращает версию данных таблицы на момент ее чтения с диска.
+
+    Версия меняется, только когда журнал проигрывается заново (первое
+    обращение или изменение файла извне), но не при собственных записях.
+
+    Args:
+        table_name: Имя таблицы
+
+    Returns:
+        Номер версии или 0, если таблица не загружена
+    """
+    return _TABLE_LOADED.get(table_name, 0)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """
+    Записывает буфер в файловый дескриптор целиком.
+
+    Данные передаются os.write без промежуточной буферизации; цикл
+    нужен только на случай частичной записи.
+
+    Args:
+        fd: Файловый дескриптор
+        data: Данные для записи
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _atomic_write(
+        filepath: Union[str, Path],
+        data: bytes,
+        durable: bool = True
+) -> None:
+    """
+    Атомарно заменяет содержимое файла.
+
+    Данные целиком пишутся во временный файл рядом с целевым и
+    переименовываются поверх него через os.replace, поэтому при сбое
+    программы остается либо старый, либо новый файл.
+
+    Args:
+        filepath: Путь к файлу
+        data: Новое содержимое
+        durable: Сбросить данные на диск (fsync) перед заменой, чтобы
+            новый файл пережил и сбой питания
+    """
+    tmp_path = os.fspath(filepath) + ".tmp"
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o644)
+    try:
+        _write_all(fd, data)
+        if durable:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, filepath)
+
+
+def _close_log(table_name: str) -> None:
+    """
+    Закрывает открытый на дозапись журнал таблицы.
+
+    Args:
+        table_name: Имя таблицы
+    """
+    handle = _LOG_HANDLES.pop(table_name, None)
+    if handle is not None:
+        handle.close()
+    _PENDING_FSYNC.pop(table_name, None)
 
 
 @handle_db_errors
-def save_table_data(table_name: str, data: List[Dict[str, Any]]) -> None:
+def save_table_data(table_name: str, data: List[Tuple[Any, ...]]) -> None:
+    """
+    Полностью перезаписывает журнал таблицы текущим набором строк.
+
+    Журнал заменяется атомарно, поэтому сжатие не может оставить
+    наполовину записанный файл.
+
+    Args:
+        table_name: Имя таблицы
+        data: Строки таблицы (значения в порядке столбцов, ID первым)
+    """
+    _rewrite_log(table_name, data)
+
+
+def _rewrite_log(table_name: str, data: List[Tuple[Any, ...]]) -> None:
     """
-    Сохраняет данные таблицы в JSON-файл.
+    Перезаписывает журнал таблицы, не перехватывая ошибки записи.
+
+    Args:
+        table_name: Имя таблицы
+        data: Строки таблицы (значения в порядке столбцов, ID первым)
+    """
+    _close_log(table_name)
+
+    filepath = get_table_filepath(table_name)
+    lines = [_encode_entry({"op": "i", "row": row}) for row in data]
+    _atomic_write(filepath, b"".join(lines))
+
+    _TABLE_CACHE[table_name] = {row[0]: tuple(row) for row in data}
+    _TABLE_STAT[table_name] = _file_signature(os.stat(filepath))
+    _TABLE_VERSION[table_name] = next(_VERSION_COUNTER)
+    _LOG_STATS[table_name] = [len(lines), 0]
+
+
+def append_table_log(table_name: str, entries: List[Dict[str, Any]]) -> None:
+    """
+    Дописывает записи в конец журнала таблицы.
+
+    Файл журнала держится открытым между вызовами без буферизации:
+    все записи кодируются в один буфер и уходят одним вызовом os.write.
+    fsync выполняется раз в LOG_FSYNC_THRESHOLD записей. Если доля
+    патчей и удалений превышает LOG_COMPACT_RATIO, журнал сжимается.
+
+    Если журнал изменен извне после последней загрузки, кэш таблицы
+    сбрасывается, и при следующем обращении она перечитывается с диска
+    вместе с новыми записями.
+
+    Ошибки записи не перехватываются, чтобы вызывающий код не считал
+    изменение сохраненным.
 
     Args:
         table_name: Имя таблицы
-        data: Данные для сохранения
+        entries: Записи журнала
     """
     filepath = get_table_filepath(table_name)
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    rows = _TABLE_CACHE.get(table_name)
+    if rows is not None:
+        try:
+            signature: Optional[Tuple[int, int]] = _file_signature(os.stat(filepath))
+        except FileNotFoundError:
+            signature = None
+        if signature != _TABLE_STAT.get(table_name):
+            # Файл мог быть заменен, поэтому журнал открывается заново
+            _close_log(table_name)
+            del _TABLE_CACHE[table_name]
+            _LOG_STATS.pop(table_name, None)
+            _TABLE_VERSION[table_name] = next(_VERSION_COUNTER)
+            rows = None
+
+    handle = _LOG_HANDLES.get(table_name)
+    if handle is None:
+        handle = open(filepath, 'ab', buffering=0)
+        _LOG_HANDLES[table_name] = handle
+
+    _write_all(handle.fileno(), b"".join([_encode_entry(entry) for entry in entries]))
+
+    pending = _PENDING_FSYNC.get(table_name, 0) + len(entries)
+    if pending >= LOG_FSYNC_THRESHOLD:
+        os.fsync(handle.fileno())
+        pending = 0
+    _PENDING_FSYNC[table_name] = pending
+
+    if rows is not None:
+        for entry in entries:
+            _apply_entry(rows, entry)
+        _TABLE_STAT[table_name] = _file_signature(os.fstat(handle.fileno()))
+        _TABLE_VERSION[table_name] = next(_VERSION_COUNTER)
+
+    stats = _LOG_STATS.get(table_name)
+    if stats is None:
+        return
+
+    for entry in entries:
+        weight = _entry_weight(entry)
+        stats[0] += weight
+        if entry["op"] != "i":
+            stats[1] += weight
+    if stats[1] > stats[0] * LOG_COMPACT_RATIO:
+        compact_table(table_name)
+
+
+def flush_all() -> None:
+    """
+    Сбрасывает на диск и закрывает все открытые журналы таблиц.
+
+    Вызывается при завершении работы, в том числе автоматически через
+    atexit, чтобы записи после последнего fsync не остались только в
+    буферах ОС.
+    """
+    for table_name, handle in list(_LOG_HANDLES.items()):
+        if _PENDING_FSYNC.get(table_name):
+            os.fsync(handle.fileno())
+        _close_log(table_name)
+
+
+atexit.register(flush_all)
+
+
+@handle_db_errors
+def compact_table(table_name: str) -> None:
+    """
+    Сжимает журнал таблицы, оставляя только актуальные записи.
+
+    Если в журнале нет ни патчей, ни удалений, он уже совпадает со
+    сжатым и не перезаписывается.
+
+    Args:
+        table_name: Имя таблицы
+    """
+    rows = load_table_data(table_name)
+    stats = _LOG_STATS.get(table_name)
+    if stats is not None and stats[1] == 0:
+        return
+    save_table_data(table_name, rows)
 
 
 @handle_db_errors
 def delete_table_file(table_name: str) -> None:
     """
-    Удаляет файл данных таблицы.
+    Удаляет журнал таблицы.
 
     Args:
         table_name: Имя таблицы
     """
-    filepath = get_table_filepath(table_name)
+    _close_log(table_name)
+    _LOG_STATS.pop(table_name, None)
+    _TABLE_CACHE.pop(table_name, None)
+    _TABLE_STAT.pop(table_name, None)
+    _TABLE_VERSION.pop(table_name, None)
+
     try:
-        filepath.unlink()
+        os.unlink(get_table_filepath(table_name))
     except FileNotFoundError:
-        pass
\ No newline at end of file
+        pass
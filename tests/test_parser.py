@@ -0,0 +1,79 @@
+"""Тесты разбора команд: токенизатор должен совпадать с shlex.split."""
+import shlex
+import unittest
+
+from src.primitive_db.parser import (
+    _VALUE_RE,
+    _split,
+    parse_insert_values,
+    parse_set_clause,
+    parse_where_condition,
+)
+
+# Строки, на которых поведение токенизатора сверяется с shlex.split
+SHLEX_CASES = [
+    'name = Bo',
+    'name = "Bo Smith"',
+    "name = 'Bo Smith'",
+    'name="Bo"',
+    'name = ""',
+    "name = ''",
+    'name = "a\\"b"',
+    'name = "a\\\\b"',
+    'name = "a\\nb"',
+    "name = 'a\\b'",
+    'name = a\\ b',
+    'a = b"c d"',
+    "a = 'x'\"y\"z",
+    '  age   =   28  ',
+    'name = "日本"',
+    'name = "a\'b"',
+    "name = 'a\"b'",
+]
+
+
+class TestSplit(unittest.TestCase):
+    """Токенизатор WHERE/SET."""
+
+    def test_matches_shlex(self):
+        for text in SHLEX_CASES:
+            with self.subTest(text=text):
+                self.assertEqual(_split(text), shlex.split(text))
+
+    def test_errors_like_shlex(self):
+        for text in ['name = "Bo', "name = 'Bo", 'name = Bo\\', 'a"b = c']:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    shlex.split(text)
+                with self.assertRaises(ValueError):
+                    _split(text)
+
+    def test_values_split_on_commas(self):
+        text = '"Bo, Jr", 28,true ,"a\\"b"'
+        self.assertEqual(_split(text, _VALUE_RE), ['Bo, Jr', '28', 'true', 'a"b'])
+
+    def test_values_without_quoted_commas_match_shlex(self):
+        for text in ['"Bo", 28, true', "'a b',c,  d", 'x"y z",1']:
+            with self.subTest(text=text):
+                self.assertEqual(
+                    _split(text, _VALUE_RE), shlex.split(text.replace(',', ' '))
+                )
+
+
+class TestParsers(unittest.TestCase):
+    """Разбор условий и значений."""
+
+    def test_where_with_escaped_quote(self):
+        self.assertEqual(parse_where_condition('name = "a\\"b"'), {'name': 'a"b'})
+
+    def test_set_with_int(self):
+        self.assertEqual(parse_set_clause('age = 28'), {'age': 28})
+
+    def test_insert_values(self):
+        self.assertEqual(
+            parse_insert_values('("Bo", 28, true)'), ['Bo', 28, True]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+"""Тесты хранения таблиц: журнал, его восстановление, сжатие и миграция."""
+import contextlib
+import errno
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.primitive_db import core, utils
+
+
+def _reset_state() -> None:
+    """Сбрасывает состояние модулей в памяти, как при перезапуске процесса."""
+    utils.flush_all()
+    for table_name in list(utils._LOG_HANDLES):
+        utils._close_log(table_name)
+    for cache in (
+        utils._LOG_STATS,
+        utils._TABLE_CACHE,
+        utils._TABLE_STAT,
+        utils._TABLE_VERSION,
+        utils._TABLE_LOADED,
+        utils._META_CACHE,
+        utils._META_WRITTEN,
+        core._INDEXES,
+        core._INDEX_VERSION,
+    ):
+        cache.clear()
+    utils._DATA_DIR_PATH = None
+    utils.get_table_filepath.cache_clear()
+    core._select_cached.cache_clear()
+
+
+class StorageTestCase(unittest.TestCase):
+    """Каждый тест работает в своей временной рабочей директории."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        _reset_state()
+        _, _, self.metadata = core.create_table({}, "t", ["name:str", "age:int"])
+        self.log = Path("data") / "t.log"
+
+    def tearDown(self):
+        _reset_state()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def insert(self, *values):
+        success, message = core.insert(self.metadata, "t", list(values))
+        self.assertTrue(success, message)
+
+    def reopen(self):
+        """Перечитывает все с диска, метаданные таблицы остаются в памяти."""
+        _reset_state()
+        for key in [k for k in self.metadata["t"] if k.startswith("_")]:
+            del self.metadata["t"][key]
+
+    def rows(self):
+        return utils.load_table_data("t")
+
+
+class TestReplay(StorageTestCase):
+    """Восстановление таблицы по журналу."""
+
+    def test_replay_after_reopen(self):
+        self.insert("a", 1)
+        self.insert("b", 2)
+        self.insert("c", 3)
+        core.update(self.metadata, "t", {"age": 20}, {"name": "b"})
+        core.delete(self.metadata, "t", {"name": "a"}, force=True)
+        expected = [(2, "b", 20), (3, "c", 3)]
+        self.assertEqual(self.rows(), expected)
+
+        self.reopen()
+        self.assertEqual(self.rows(), expected)
+        self.insert("d", 4)
+        self.assertEqual(self.rows()[-1], (4, "d", 4))
+
+    def test_torn_last_line_is_truncated(self):
+        self.insert("a", 1)
+        self.insert("b", 2)
+        self.reopen()
+        intact = self.log.read_bytes()
+        with open(self.log, "ab") as f:
+            f.write(b'{"op":"i","row":[3,"c"')
+
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(self.rows(), [(1, "a", 1), (2, "b", 2)])
+        self.assertIn("оборвана", out.getvalue())
+        self.assertEqual(self.log.read_bytes(), intact)
+
+        self.insert("c", 3)
+        self.reopen()
+        self.assertEqual(self.rows()[-1], (3, "c", 3))
+
+    def test_corrupt_middle_line_keeps_file(self):
+        for i in range(5):
+            self.insert(f"n{i}", i)
+        self.reopen()
+        lines = self.log.read_bytes().splitlines(keepends=True)
+        lines[1] = b'{"op":"i","ro\n'
+        damaged = b"".join(lines)
+        self.log.write_bytes(damaged)
+
+        with self.assertRaises(ValueError):
+            utils.load_table_rows("t")
+        self.assertEqual(self.log.read_bytes(), damaged)
+
+
+class TestEmptyWhere(StorageTestCase):
+    """Пустое условие выбирает все строки."""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            self.insert(f"n{i}", i)
+
+    def test_update_all(self):
+        success, _ = core.update(self.metadata, "t", {"age": 7}, {})
+        self.assertTrue(success)
+        self.assertEqual([row[2] for row in self.rows()], [7, 7, 7])
+
+    def test_delete_all(self):
+        success, _ = core.delete(self.metadata, "t", {}, force=True)
+        self.assertTrue(success)
+        self.assertEqual(self.rows(), [])
+
+
+class TestSelect(StorageTestCase):
+    """Результаты SELECT."""
+
+    def test_cached_result_is_not_shared(self):
+        self.insert("a", 1)
+        _, _, data = core.select(self.metadata, "t", {"name": "a"})
+        data[0]["age"] = 100
+        _, _, data = core.select(self.metadata, "t", {"name": "a"})
+        self.assertEqual(data, [{"ID": 1, "name": "a", "age": 1}])
+
+
+class TestCompaction(StorageTestCase):
+    """Сжатие журнала."""
+
+    def test_compaction_keeps_rows(self):
+        for i in range(10):
+            self.insert(f"n{i}", i)
+        for i in range(10):
+            core.update(self.metadata, "t", {"age": i * 10}, {"name": f"n{i}"})
+        core.delete(self.metadata, "t", {"name": "n0"}, force=True)
+        expected = [(i + 1, f"n{i}", i * 10) for i in range(1, 10)]
+        self.assertEqual(self.rows(), expected)
+
+        # После сжатия в журнале остались только вставки актуальных строк
+        lines = self.log.read_bytes().splitlines()
+        self.assertLess(len(lines), 21)
+
+        self.reopen()
+        self.assertEqual(self.rows(), expected)
+
+
+class TestMigration(StorageTestCase):
+    """Перевод таблиц из старого формата JSON."""
+
+    def setUp(self):
+        super().setUp()
+        self.log.unlink(missing_ok=True)
+        self.legacy = Path("data") / "t.json"
+        self.legacy.write_text(
+            '[{"ID": 1, "name": "a", "age": 1}, {"ID": 2, "name": "b", "age": 2}]'
+        )
+
+    def test_migration(self):
+        self.assertEqual(self.rows(), [(1, "a", 1), (2, "b", 2)])
+        self.assertFalse(self.legacy.exists())
+        self.assertTrue(self.log.exists())
+
+        self.reopen()
+        self.assertEqual(self.rows(), [(1, "a", 1), (2, "b", 2)])
+
+    def test_failed_migration_keeps_legacy_file(self):
+        error = OSError(errno.ENOSPC, "No space left on device")
+        with mock.patch.object(utils, "_atomic_write", side_effect=error):
+            with self.assertRaises(OSError):
+                utils.load_table_rows("t")
+        self.assertTrue(self.legacy.exists())
+        self.assertFalse(self.log.exists())
+
+
+class TestExternalChanges(StorageTestCase):
+    """Изменения журнала другим процессом."""
+
+    def test_insert_after_external_rewrite(self):
+        self.insert("a", 1)
+        replacement = Path("data") / "t.new"
+        replacement.write_bytes(
+            b'{"op":"i","row":[1,"a",1]}\n{"op":"i","row":[2,"x",9]}\n'
+        )
+        os.replace(replacement, self.log)
+
+        success, _, data = core.select(self.metadata, "t")
+        self.assertTrue(success)
+        self.assertEqual(len(data), 2)
+
+        self.insert("b", 2)
+        expected = [(1, "a", 1), (2, "x", 9), (3, "b", 2)]
+        self.assertEqual(self.rows(), expected)
+        self.reopen()
+        self.assertEqual(self.rows(), expected)
+
+    def test_external_append_does_not_reuse_ids(self):
+        self.insert("a", 1)
+        with open(self.log, "ab") as f:
+            f.write(b'{"op":"i","row":[5,"x",9]}\n')
+
+        self.insert("b", 2)
+        self.reopen()
+        self.assertEqual(self.rows(), [(1, "a", 1), (5, "x", 9), (6, "b", 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()